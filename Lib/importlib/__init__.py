@@ -42,8 +42,11 @@ def invalidate_caches():
     """Call the invalidate_caches() method on all meta path finders stored in
     sys.meta_path (where implemented)."""
     for finder in sys.meta_path:
-        if hasattr(finder, 'invalidate_caches'):
-            finder.invalidate_caches()
+        # getattr() with a default probes and fetches in one lookup where
+        # hasattr() followed by an attribute access would pay for two.
+        method = getattr(finder, 'invalidate_caches', None)
+        if method is not None:
+            method()
 
 
 def find_spec(name, path=None):
@@ -61,10 +64,11 @@ def find_spec(name, path=None):
     order for a submodule to get the correct spec.
 
     """
-    if name not in sys.modules:
+    modules = sys.modules
+    if name not in modules:
         return _bootstrap._find_spec(name, path)
     else:
-        module = sys.modules[name]
+        module = modules[name]
         if module is None:
             return None
         try:
@@ -84,8 +88,9 @@ def find_loader(name, path=None):
     This is a backward-compatible wrapper around find_spec().
 
     """
+    modules = sys.modules
     try:
-        loader = sys.modules[name].__loader__
+        loader = modules[name].__loader__
         if loader is None:
             raise ValueError('{}.__loader__ is None'.format(name))
         else:
@@ -116,17 +121,17 @@ def import_module(name, package=None):
     relative import to an absolute import.
 
     """
-    level = 0
     if name.startswith('.'):
         if not package:
             msg = ("the 'package' argument is required to perform a relative "
                    "import for {!r}")
             raise TypeError(msg.format(name))
-        for character in name:
-            if character != '.':
-                break
-            level += 1
-    return _bootstrap._gcd_import(name[level:], package, level)
+        # Let str.lstrip() count the leading dots instead of scanning the
+        # name one character at a time.
+        stripped = name.lstrip('.')
+        return _bootstrap._gcd_import(stripped, package,
+                                      len(name) - len(stripped))
+    return _bootstrap._gcd_import(name, package, 0)
 
 
 _RELOADING = {}
@@ -145,22 +150,27 @@ def reload(module):
     except AttributeError:
         name = module.__name__
 
-    if sys.modules.get(name) is not module:
+    modules = sys.modules
+    if modules.get(name) is not module:
         msg = "module {} not in sys.modules"
         raise ImportError(msg.format(name), name=name)
     if name in _RELOADING:
         return _RELOADING[name]
     _RELOADING[name] = module
     try:
-        parent_name = name.rpartition('.')[0]
-        if parent_name and parent_name not in sys.modules:
-            msg = "parent {!r} not in sys.modules"
-            raise ImportError(msg.format(parent_name), name=parent_name)
+        # str.rfind() returns a plain index where rpartition() would
+        # allocate three strings just to get at the prefix.
+        dot = name.rfind('.')
+        if dot > 0:
+            parent_name = name[:dot]
+            if parent_name not in modules:
+                msg = "parent {!r} not in sys.modules"
+                raise ImportError(msg.format(parent_name), name=parent_name)
         spec = module.__spec__ = _bootstrap._find_spec(name, None, module)
         methods = _bootstrap._SpecMethods(spec)
         methods.exec(module)
         # The module may have replaced itself in sys.modules!
-        return sys.modules[name]
+        return modules[name]
     finally:
         try:
             del _RELOADING[name]
@@ -123,18 +123,24 @@ option '-uall,-gui'.
 import importlib
 
 import argparse
+import base64
 import builtins
+import collections
 import faulthandler
+import gc
 import io
 import json
 import locale
 import logging
+import marshal
 import os
 import platform
 import random
 import re
+import selectors
 import shutil
 import signal
+import stat
 import sys
 import sysconfig
 import tempfile
@@ -241,6 +247,8 @@ def _create_parser():
                        help='wait for user input, e.g., allow a debugger '
                             'to be attached')
     group.add_argument('--slaveargs', metavar='ARGS')
+    group.add_argument('--worker-loop', action='store_true',
+                       dest='worker_loop', help=argparse.SUPPRESS)
     group.add_argument('-S', '--start', metavar='START',
                        help='the name of the test at which to start.' +
                             more_details)
@@ -304,6 +312,12 @@ def _create_parser():
     group.add_argument('-j', '--multiprocess', metavar='PROCESSES',
                        dest='use_mp', type=int,
                        help='run PROCESSES processes at once')
+    group.add_argument('--fresh', action='store_true',
+                       help='with -j, run every test in its own short-lived '
+                            'process instead of reusing long-lived worker '
+                            'processes; the process is forked from the '
+                            'master where fork is available, and a freshly '
+                            'started interpreter elsewhere')
     group.add_argument('-T', '--coverage', action='store_true',
                        dest='trace',
                        help='turn on code coverage tracing using the trace '
@@ -322,6 +336,18 @@ def _create_parser():
     group.add_argument('-F', '--forever', action='store_true',
                        help='run the specified tests in a loop, until an '
                             'error happens')
+    group.add_argument('--pgo', action='store_true',
+                       help='enable Profile Guided Optimization training; '
+                            'suppress error output and skip '
+                            'environment-change monitoring')
+    group.add_argument('--env-cache', action='store_true',
+                       help='skip the environment-change monitoring (and '
+                            'its per-test restore of the watched globals) '
+                            'for tests that a previous run with this option '
+                            'saw leave the environment untouched; faster, '
+                            'but a test that starts mutating the '
+                            'environment goes unreported until its source '
+                            'changes')
 
     parser.add_argument('args', nargs=argparse.REMAINDER,
                         help=argparse.SUPPRESS)
@@ -424,11 +450,55 @@ def _parse_args(args, **kwargs):
     return ns
 
 
+def _encode_data(obj, _dumps=marshal.dumps, _b64encode=base64.b64encode):
+    """Serialize an object for the slave/worker IPC protocol.
+
+    marshal is C-implemented and considerably faster than json for the
+    bools/ints/strings exchanged here, and both ends are always the same
+    Python build.  base64 keeps the payload a single ASCII line.  The
+    codec entry points are bound once as defaults; this runs for every
+    test of a -j run, so even the module attribute lookups add up.
+    """
+    return _b64encode(_dumps(obj)).decode('ascii')
+
+
+def _decode_data(data, _loads=marshal.loads, _b64decode=base64.b64decode):
+    """Inverse of _encode_data(); accepts str or bytes."""
+    return _loads(_b64decode(data))
+
+
+# Prefix of every result line a --worker-loop worker writes to its stdout.
+# Tests (and child processes inheriting the worker's fd 1) can write to the
+# real stdout behind the captured sys.stdout; the marker lets the master
+# tell result lines from such stray output instead of feeding the first
+# line it sees to _decode_data().
+_RESULT_MARKER = b'@regrtest-worker-result:'
+
+
+def _split_result_line(stdout):
+    """Split a slave's stdout into its output and trailing result line.
+
+    Equivalent to stdout.strip().rpartition('\\n') but locates the last
+    line by index, so a test that printed megabytes of output does not
+    pay for a stripped copy of all of it plus rpartition's three-string
+    tuple.  Returns an ('', '') pair for empty output.
+    """
+    end = len(stdout)
+    while end > 0 and stdout[end-1] in ' \t\r\n':
+        end -= 1
+    nl = stdout.rfind('\n', 0, end)
+    if nl < 0:
+        return '', stdout[:end]
+    return stdout[:nl], stdout[nl+1:end]
+
+
 def run_test_in_subprocess(testname, ns):
-    """Run the given test in a subprocess with --slaveargs.
+    """Run the given test in a freshly started interpreter with --slaveargs.
 
-    ns is the option Namespace parsed from command-line arguments. regrtest
-    is invoked in a subprocess with the --slaveargs argument; when the
+    This is the --fresh path on platforms without os.fork(); where fork
+    is available, run_test_in_forked_child() is used instead.  ns is the
+    option Namespace parsed from command-line arguments. regrtest is
+    invoked in a subprocess with the --slaveargs argument; when the
     subprocess exits, its return code, stdout and stderr are returned as a
     3-tuple.
     """
@@ -436,17 +506,22 @@ def run_test_in_subprocess(testname, ns):
     base_cmd = ([sys.executable] + support.args_from_interpreter_flags() +
                 ['-X', 'faulthandler', '-m', 'test.regrtest'])
 
-    slaveargs = (
-            (testname, ns.verbose, ns.quiet),
-            dict(huntrleaks=ns.huntrleaks,
-                 use_resources=ns.use_resources,
-                 output_on_failure=ns.verbose3,
-                 timeout=ns.timeout, failfast=ns.failfast,
-                 match_tests=ns.match_tests))
+    # The keyword arguments never change during a run; build the dict
+    # once and keep it on the namespace.
+    kwargs = getattr(ns, '_slave_kwargs', None)
+    if kwargs is None:
+        kwargs = ns._slave_kwargs = dict(
+                huntrleaks=ns.huntrleaks,
+                use_resources=ns.use_resources,
+                output_on_failure=ns.verbose3,
+                timeout=ns.timeout, failfast=ns.failfast,
+                match_tests=ns.match_tests, pgo=ns.pgo,
+                env_cache=ns.env_cache)
+    slaveargs = ((testname, ns.verbose, ns.quiet), kwargs)
     # Running the child from the same working directory as regrtest's original
     # invocation ensures that TEMPDIR for the child is the same when
     # sysconfig.is_python_build() is true. See issue 15300.
-    popen = Popen(base_cmd + ['--slaveargs', json.dumps(slaveargs)],
+    popen = Popen(base_cmd + ['--slaveargs', _encode_data(slaveargs)],
                   stdout=PIPE, stderr=PIPE,
                   universal_newlines=True,
                   close_fds=(os.name != 'nt'),
@@ -456,6 +531,262 @@ def run_test_in_subprocess(testname, ns):
     return retcode, stdout, stderr
 
 
+# Forking a --fresh child from the master is much cheaper than spawning a
+# new interpreter: the child inherits the already warm import state.
+_HAVE_FORK = multiprocessing is not None and hasattr(os, 'fork')
+
+
+def _forked_child_main(conn, testname, ns):
+    """Entry point of a forked --fresh child (run_test_in_forked_child).
+
+    Runs the test with sys.stdout/sys.stderr captured and sends the
+    (result, stdout, stderr) tuple back over the pipe.  The child works
+    in its own temporary directory, like a spawned slave would, so
+    concurrent children cannot trample each other's TESTFN droppings.
+    """
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    sys.stdout = stdout
+    sys.stderr = stderr
+    if ns.huntrleaks:
+        unittest.BaseTestSuite._cleanup = False
+    test_cwd = os.path.join(TEMPDIR, 'test_python_{}'.format(os.getpid()))
+    try:
+        with support.temp_cwd(test_cwd, quiet=True):
+            result = runtest(testname, ns.verbose, ns.quiet,
+                             ns.huntrleaks,
+                             use_resources=ns.use_resources,
+                             output_on_failure=ns.verbose3,
+                             timeout=ns.timeout, failfast=ns.failfast,
+                             match_tests=ns.match_tests, pgo=ns.pgo,
+                             env_cache=ns.env_cache)
+    except KeyboardInterrupt:
+        result = INTERRUPTED, ''
+    except BaseException as e:
+        traceback.print_exc()
+        result = CHILD_ERROR, str(e)
+    conn.send((result, stdout.getvalue(), stderr.getvalue()))
+    conn.close()
+
+
+def run_test_in_forked_child(testname, ns):
+    """Run the given test in a child forked from this process (--fresh).
+
+    The fork start method gives the test a process of its own while
+    skipping the interpreter startup and stdlib imports that a spawned
+    slave redoes; the master has already paid for them.  Return the
+    same (retcode, stdout, stderr, result) shape as TestWorker.run_test.
+    """
+    ctx = multiprocessing.get_context('fork')
+    recv, send = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_forked_child_main,
+                       args=(send, testname, ns))
+    proc.start()
+    send.close()
+    try:
+        payload = recv.recv()
+    except EOFError:
+        payload = None
+    recv.close()
+    proc.join()
+    if payload is None:
+        return proc.exitcode or 1, '', '', None
+    result, stdout, stderr = payload
+    return 0, stdout, stderr, result
+
+
+def run_worker_loop():
+    """Run tests sent by the master process over stdin (--worker-loop).
+
+    The first line carries the runtest() arguments shared by every test
+    of the run; each following line is just a test name.  The test is
+    run with sys.stdout and sys.stderr captured, and a single line
+    holding _RESULT_MARKER followed by the encoded (result, stdout,
+    stderr) tuple is written back; the marker lets the master separate
+    result lines from anything a test wrote to the real stdout behind
+    our back.  The loop ends when the master closes our stdin.
+    """
+    # The result line is the per-test hot path of the protocol: write it
+    # straight to the stdout file descriptor rather than paying for the
+    # TextIOWrapper encode/lock/flush machinery on every test.
+    result_fd = sys.stdout.fileno()
+    config = sys.stdin.readline().strip()
+    if not config:
+        return
+    verbose, quiet, kwargs = _decode_data(config)
+    if kwargs.get('huntrleaks'):
+        unittest.BaseTestSuite._cleanup = False
+    for line in sys.stdin:
+        testname = line.strip()
+        if not testname:
+            continue
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        orig_stdout = sys.stdout
+        orig_stderr = sys.stderr
+        try:
+            sys.stdout = stdout
+            sys.stderr = stderr
+            try:
+                result = runtest(testname, verbose, quiet, **kwargs)
+            except KeyboardInterrupt:
+                result = INTERRUPTED, ''
+            except BaseException as e:
+                traceback.print_exc()
+                result = CHILD_ERROR, str(e)
+        finally:
+            sys.stdout = orig_stdout
+            sys.stderr = orig_stderr
+        data = _encode_data((result, stdout.getvalue(), stderr.getvalue()))
+        os.write(result_fd, _RESULT_MARKER + data.encode('ascii') + b'\n')
+
+
+class TestWorker(object):
+
+    """A long-lived test-running subprocess fed over a pipe (-j workers).
+
+    Spawning a fresh interpreter for every test pays the full startup
+    and import cost each time; a persistent worker pays it once.  The
+    worker runs each test in-process, exactly like runtest() does when
+    regrtest is run without -j, and reports the captured output along
+    with the result (see run_worker_loop()).
+
+    On POSIX the worker's stdout and stderr pipes are drained together
+    with a selector, so output written directly to the worker's file
+    descriptors (e.g. a faulthandler traceback) is streamed as it is
+    produced instead of buffered until the worker exits.  Elsewhere the
+    worker inherits the master's stderr.
+    """
+
+    def __init__(self, ns):
+        from subprocess import Popen, PIPE
+        self.ns = ns
+        base_cmd = ([sys.executable] + support.args_from_interpreter_flags() +
+                    ['-X', 'faulthandler', '-m', 'test.regrtest',
+                     '--worker-loop'])
+        # Running the worker from the same working directory as regrtest's
+        # original invocation ensures that TEMPDIR for the worker is the
+        # same when sysconfig.is_python_build() is true. See issue 15300.
+        stderr = PIPE if os.name == 'posix' else None
+        self.popen = Popen(base_cmd,
+                           stdin=PIPE, stdout=PIPE, stderr=stderr,
+                           close_fds=(os.name != 'nt'),
+                           cwd=support.SAVEDCWD)
+        # The runtest() arguments are identical for every test of the
+        # run: serialize them once and send them ahead of the first
+        # test, so the per-test request is just the test name.
+        config = (ns.verbose, ns.quiet,
+                  dict(huntrleaks=ns.huntrleaks,
+                       use_resources=ns.use_resources,
+                       output_on_failure=ns.verbose3,
+                       timeout=ns.timeout, failfast=ns.failfast,
+                       match_tests=ns.match_tests, pgo=ns.pgo,
+                       env_cache=ns.env_cache))
+        self.popen.stdin.write((_encode_data(config) + '\n').encode('ascii'))
+        self._outbuf = b''
+        if stderr is not None:
+            self.selector = selectors.DefaultSelector()
+            self.selector.register(self.popen.stdout, selectors.EVENT_READ)
+            self.selector.register(self.popen.stderr, selectors.EVENT_READ)
+        else:
+            self.selector = None
+
+    def _read_line(self):
+        """Read the worker's next stdout line, streaming stderr meanwhile.
+
+        Return a (line, stderr) pair; line is a bytes object without its
+        trailing newline, or None if the worker exited without writing
+        one.  Watching both pipes with the selector keeps a worker that
+        floods stderr from filling the pipe and deadlocking against a
+        blocking read of stdout.
+        """
+        popen = self.popen
+        stderr_parts = []
+        buf = self._outbuf
+        while b'\n' not in buf:
+            for key, events in self.selector.select():
+                data = os.read(key.fd, 32768)
+                if key.fileobj is popen.stderr:
+                    if data:
+                        stderr_parts.append(data)
+                    else:
+                        self.selector.unregister(popen.stderr)
+                elif data:
+                    buf += data
+                else:
+                    # stdout hit EOF: the worker is gone.  Collect any
+                    # remaining stderr and report the missing line.
+                    self.selector.unregister(popen.stdout)
+                    try:
+                        self.selector.unregister(popen.stderr)
+                    except KeyError:
+                        pass
+                    else:
+                        stderr_parts.append(popen.stderr.read())
+                    self._outbuf = b''
+                    return None, b''.join(stderr_parts)
+        line, _, self._outbuf = buf.partition(b'\n')
+        # Grab stderr that is already available, so it stays attributed
+        # to the test that produced it.
+        while True:
+            ready = [key for key, events in self.selector.select(0)
+                     if key.fileobj is popen.stderr]
+            if not ready:
+                break
+            data = os.read(ready[0].fd, 32768)
+            if not data:
+                self.selector.unregister(popen.stderr)
+                break
+            stderr_parts.append(data)
+        return line, b''.join(stderr_parts)
+
+    def run_test(self, testname):
+        """Run a single test in the worker.
+
+        Return a (retcode, stdout, stderr, result) tuple; result is None
+        if the worker exited without reporting one (e.g. it crashed).
+        Stdout lines without the _RESULT_MARKER prefix are stray output
+        that the test (or a child process inheriting the worker's stdout)
+        wrote past the captured sys.stdout; they are forwarded as test
+        output instead of being decoded.
+        """
+        self.popen.stdin.write((testname + '\n').encode('ascii'))
+        self.popen.stdin.flush()
+        stray_lines = []
+        stderr_parts = []
+        while True:
+            if self.selector is not None:
+                line, worker_stderr = self._read_line()
+                if worker_stderr:
+                    stderr_parts.append(worker_stderr)
+            else:
+                line = self.popen.stdout.readline()
+                line = line.rstrip(b'\r\n') if line else None
+            if line is None or line.startswith(_RESULT_MARKER):
+                break
+            stray_lines.append(line)
+        worker_stderr = b''.join(stderr_parts).decode('utf-8',
+                                                      'backslashreplace')
+        stray = b'\n'.join(stray_lines).decode('utf-8', 'backslashreplace')
+        if line is None:
+            return self.popen.wait(), stray, worker_stderr, None
+        result, stdout, stderr = _decode_data(line[len(_RESULT_MARKER):])
+        if stray:
+            stdout = stray + '\n' + stdout if stdout else stray
+        return 0, stdout, stderr + worker_stderr, result
+
+    def close(self):
+        if self.selector is not None:
+            self.selector.close()
+        if self.popen.stdin:
+            self.popen.stdin.close()
+        self.popen.wait()
+        if self.popen.stdout:
+            self.popen.stdout.close()
+        if self.popen.stderr:
+            self.popen.stderr.close()
+
+
 def main(tests=None, **kwargs):
     """Execute a test suite.
 
@@ -504,7 +835,6 @@ def main(tests=None, **kwargs):
     if ns.memlimit is not None:
         support.set_memlimit(ns.memlimit)
     if ns.threshold is not None:
-        import gc
         gc.set_threshold(ns.threshold)
     if ns.nowindows:
         import msvcrt
@@ -525,7 +855,7 @@ def main(tests=None, **kwargs):
         input("Press any key to continue...")
 
     if ns.slaveargs is not None:
-        args, kwargs = json.loads(ns.slaveargs)
+        args, kwargs = _decode_data(ns.slaveargs)
         if kwargs.get('huntrleaks'):
             unittest.BaseTestSuite._cleanup = False
         try:
@@ -536,8 +866,14 @@ def main(tests=None, **kwargs):
             traceback.print_exc()
             result = CHILD_ERROR, str(e)
         sys.stdout.flush()
-        print()   # Force a newline (just in case)
-        print(json.dumps(result))
+        # The leading newline forces the result onto a line of its own
+        # (just in case); a single raw write emits it in one syscall.
+        os.write(sys.stdout.fileno(),
+                 ('\n' + _encode_data(result) + '\n').encode('ascii'))
+        sys.exit(0)
+
+    if ns.worker_loop:
+        run_worker_loop()
         sys.exit(0)
 
     good = []
@@ -548,17 +884,11 @@ def main(tests=None, **kwargs):
     interrupted = False
 
     if ns.findleaks:
-        try:
-            import gc
-        except ImportError:
-            print('No GC available, disabling findleaks.')
-            ns.findleaks = False
-        else:
-            # Uncomment the line below to report garbage that is not
-            # freeable by reference counting alone.  By default only
-            # garbage that is not collectable by the GC is reported.
-            #gc.set_debug(gc.DEBUG_SAVEALL)
-            found_garbage = []
+        # Uncomment the line below to report garbage that is not
+        # freeable by reference counting alone.  By default only
+        # garbage that is not collectable by the GC is reported.
+        #gc.set_debug(gc.DEBUG_SAVEALL)
+        found_garbage = []
 
     if ns.huntrleaks:
         unittest.BaseTestSuite._cleanup = False
@@ -586,8 +916,8 @@ def main(tests=None, **kwargs):
     removepy(ns.args)
     removepy(tests)
 
-    stdtests = STDTESTS[:]
-    nottests = NOTTESTS.copy()
+    stdtests = list(STDTESTS)
+    nottests = set(NOTTESTS)
     if ns.exclude:
         for arg in ns.args:
             if arg in stdtests:
@@ -632,6 +962,16 @@ def main(tests=None, **kwargs):
         random.seed(ns.random_seed)
         print("Using random seed", ns.random_seed)
         random.shuffle(selected)
+    if (ns.use_mp and not ns.randomize and not ns.start
+            and selected is alltests):
+        # Hand the historically slowest tests out first so a long test
+        # at the tail cannot serialize the end of the run (LPT order).
+        # Only the default full-suite selection is reordered: a test
+        # list given on the command line, via -f/--fromfile or as the
+        # tests argument keeps the order the caller asked for.
+        durations = _load_test_durations()
+        selected.sort(key=lambda test: durations.get(test, 0.0),
+                      reverse=True)
     if ns.trace:
         import trace, tempfile
         tracer = trace.Trace(ignoredirs=[sys.base_prefix, sys.base_exec_prefix,
@@ -641,11 +981,12 @@ def main(tests=None, **kwargs):
     test_times = []
     support.verbose = ns.verbose      # Tell tests to be moderately quiet
     support.use_resources = ns.use_resources
-    save_modules = sys.modules.keys()
+    save_modules = set(sys.modules)
 
     def accumulate_result(test, result):
         ok, test_time = result
         test_times.append((test_time, test))
+        _record_test_duration(test, test_time)
         if ok == PASSED:
             good.append(test)
         elif ok == FAILED:
@@ -679,24 +1020,37 @@ def main(tests=None, **kwargs):
         except ImportError:
             print("Multiprocess option requires thread support")
             sys.exit(2)
-        from queue import Queue
         debug_output_pat = re.compile(r"\[\d+ refs, \d+ blocks\]$")
-        output = Queue()
+        output = _FastQueue()
         pending = MultiprocessTests(tests)
         def work():
             # A worker thread.
+            worker = None
             try:
+                # Spawn the worker inside the try: if starting it fails
+                # (e.g. EMFILE with many -j workers), the sentinel must
+                # still reach the main loop or it blocks forever.
+                if not ns.fresh:
+                    worker = TestWorker(ns)
                 while True:
                     try:
                         test = next(pending)
                     except StopIteration:
                         output.put((None, None, None, None))
                         return
-                    retcode, stdout, stderr = run_test_in_subprocess(test, ns)
+                    if worker is not None:
+                        retcode, stdout, stderr, result = worker.run_test(test)
+                    elif _HAVE_FORK:
+                        retcode, stdout, stderr, result = \
+                                run_test_in_forked_child(test, ns)
+                    else:
+                        retcode, stdout, stderr = run_test_in_subprocess(test, ns)
+                        stdout, result = _split_result_line(stdout)
+                        if retcode == 0 and result:
+                            result = _decode_data(result)
                     # Strip last refcount output line if it exists, since it
                     # comes from the shutdown of the interpreter in the subcommand.
                     stderr = debug_output_pat.sub("", stderr)
-                    stdout, _, result = stdout.strip().rpartition("\n")
                     if retcode != 0:
                         result = (CHILD_ERROR, "Exit code %s" % retcode)
                         output.put((test, stdout.rstrip(), stderr.rstrip(), result))
@@ -704,11 +1058,13 @@ def main(tests=None, **kwargs):
                     if not result:
                         output.put((None, None, None, None))
                         return
-                    result = json.loads(result)
                     output.put((test, stdout.rstrip(), stderr.rstrip(), result))
             except BaseException:
                 output.put((None, None, None, None))
                 raise
+            finally:
+                if worker is not None:
+                    worker.close()
         workers = [Thread(target=work) for i in range(ns.use_mp)]
         for worker in workers:
             worker.start()
@@ -760,7 +1116,8 @@ def main(tests=None, **kwargs):
                                      ns.huntrleaks,
                                      output_on_failure=ns.verbose3,
                                      timeout=ns.timeout, failfast=ns.failfast,
-                                     match_tests=ns.match_tests)
+                                     match_tests=ns.match_tests, pgo=ns.pgo,
+                                     env_cache=ns.env_cache)
                     accumulate_result(test, result)
                 except KeyboardInterrupt:
                     interrupted = True
@@ -777,9 +1134,11 @@ def main(tests=None, **kwargs):
                     found_garbage.extend(gc.garbage)
                     del gc.garbage[:]
             # Unload the newly imported modules (best effort finalization)
-            for module in sys.modules.keys():
-                if module not in save_modules and module.startswith("test."):
-                    support.unload(module)
+            new_modules = [module for module in sys.modules
+                           if module.startswith("test.")
+                              and module not in save_modules]
+            for module in new_modules:
+                support.unload(module)
 
     if interrupted:
         # print a newline after ^C
@@ -845,7 +1204,7 @@ def main(tests=None, **kwargs):
 
 # small set of tests to determine if we have a basically functioning interpreter
 # (i.e. if any of these fail, then anything else is likely to follow)
-STDTESTS = [
+STDTESTS = (
     'test_grammar',
     'test_opcodes',
     'test_dict',
@@ -856,22 +1215,67 @@ STDTESTS = [
     'test_doctest',
     'test_doctest2',
     'test_support'
-]
+)
 
 # set of tests that we don't want to be executed when using regrtest
-NOTTESTS = set()
+NOTTESTS = frozenset()
+
+_STDTESTS_SET = frozenset(STDTESTS)
+_DEFAULT_OTHERS = _STDTESTS_SET | NOTTESTS
 
 def findtests(testdir=None, stdtests=STDTESTS, nottests=NOTTESTS):
     """Return a list of all applicable test modules."""
     testdir = findtestdir(testdir)
-    names = os.listdir(testdir)
+    # os.scandir, where the os module provides it, yields names straight
+    # from the directory stream instead of materializing the full listing
+    # up front.
+    scandir = getattr(os, 'scandir', None)
+    if scandir is not None:
+        names = (entry.name for entry in scandir(testdir))
+    else:
+        names = os.listdir(testdir)
     tests = []
-    others = set(stdtests) | nottests
+    if stdtests is STDTESTS and nottests is NOTTESTS:
+        others = _DEFAULT_OTHERS
+    else:
+        others = frozenset(stdtests) | nottests
     for name in names:
-        mod, ext = os.path.splitext(name)
-        if mod[:5] == "test_" and ext in (".py", "") and mod not in others:
+        if not name.startswith("test_"):
+            continue
+        if name.endswith(".py"):
+            mod = name[:-3]
+        elif '.' not in name:
+            mod = name
+        else:
+            continue
+        if mod not in others:
             tests.append(mod)
-    return stdtests + sorted(tests)
+    tests.sort()
+    return list(stdtests) + tests
+
+class _FastQueue(object):
+
+    """Minimal put/get queue for collecting worker output.
+
+    queue.Queue pays for maxsize bookkeeping and unfinished-task
+    tracking that the -j result pump never uses; a deque guarded by a
+    single condition roughly halves the lock traffic per item.
+    """
+
+    def __init__(self):
+        self._items = collections.deque()
+        self._cond = threading.Condition()
+
+    def put(self, item):
+        with self._cond:
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self):
+        with self._cond:
+            while not self._items:
+                self._cond.wait()
+            return self._items.popleft()
 
 # We do not use a generator so multiple threads can call next().
 class MultiprocessTests(object):
@@ -912,7 +1316,7 @@ def replace_stdout():
 def runtest(test, verbose, quiet,
             huntrleaks=False, use_resources=None,
             output_on_failure=False, failfast=False, match_tests=None,
-            timeout=None):
+            timeout=None, pgo=False, env_cache=False):
     """Run a single test.
 
     test -- the name of the test
@@ -924,6 +1328,11 @@ def runtest(test, verbose, quiet,
     output_on_failure -- if true, display test output on failure
     timeout -- dump the traceback and exit if a test takes more than
                timeout seconds
+    pgo -- if true, the run only serves PGO training: suppress error
+           output and skip environment-change monitoring
+    env_cache -- if true, skip environment-change monitoring for tests
+                 that a previous run recorded as leaving the environment
+                 untouched (see --env-cache)
     failfast, match_tests -- See regrtest command-line flags for these.
 
     Returns the tuple result, test_time, where result is one of the constants:
@@ -964,7 +1373,8 @@ def runtest(test, verbose, quiet,
                 sys.stdout = stream
                 sys.stderr = stream
                 result = runtest_inner(test, verbose, quiet, huntrleaks,
-                                       display_failure=False)
+                                       display_failure=False, pgo=pgo,
+                                       env_cache=env_cache)
                 if result[0] == FAILED:
                     output = stream.getvalue()
                     orig_stderr.write(output)
@@ -975,7 +1385,8 @@ def runtest(test, verbose, quiet,
         else:
             support.verbose = verbose  # Tell tests to be moderately quiet
             result = runtest_inner(test, verbose, quiet, huntrleaks,
-                                   display_failure=not verbose)
+                                   display_failure=not verbose, pgo=pgo,
+                                   env_cache=env_cache)
         return result
     finally:
         if use_timeout:
@@ -1254,20 +1665,164 @@ class saved_test_environment:
         return False
 
 
+# With -j, handing tests out in alphabetical order leaves one worker
+# grinding through a slow test at the end of the run while the others sit
+# idle.  Scheduling the historically slowest tests first (Longest
+# Processing Time order) maximizes overlap; the durations observed by
+# each run are remembered for the next one.
+_DURATIONS_FILE = os.path.expanduser('~/.regrtest_durations.json')
+_test_durations = None
+_test_durations_dirty = False
+
+def _load_test_durations():
+    """Return the test name -> duration mapping from previous runs."""
+    global _test_durations
+    if _test_durations is None:
+        import atexit
+        try:
+            with open(_DURATIONS_FILE) as fp:
+                _test_durations = dict(json.load(fp))
+        except (OSError, ValueError):
+            _test_durations = {}
+        atexit.register(_save_test_durations)
+    return _test_durations
+
+def _record_test_duration(test, test_time):
+    global _test_durations_dirty
+    durations = _load_test_durations()
+    if test_time > 0.0 and durations.get(test) != test_time:
+        durations[test] = test_time
+        _test_durations_dirty = True
+
+def _save_test_durations():
+    if not _test_durations_dirty:
+        return
+    # Write-and-replace so a concurrent regrtest cannot see a truncated
+    # file; losing the race only loses a few timings.
+    tmpfile = '{}.{}'.format(_DURATIONS_FILE, os.getpid())
+    try:
+        with open(tmpfile, 'w') as fp:
+            json.dump(_test_durations, fp)
+        os.replace(tmpfile, _DURATIONS_FILE)
+    except OSError:
+        pass
+
+
+# Most tests never modify any of the globals watched by
+# saved_test_environment, so the per-test snapshot/restore is wasted work
+# for them.  Under --env-cache (off by default: the snapshot also
+# *restores* what a test changed, so skipping it trades that safety net
+# for speed), tests that a previous run saw complete without changing
+# the environment are recorded in a cache file and skip the monitoring
+# on subsequent runs; delete the file to re-monitor everything.  Each entry
+# is keyed on the mtime of the test's source, so editing a test drops it
+# back to being monitored, and the whole cache carries a fingerprint of
+# the interpreter, checkout and enabled resources so stale caches from
+# other configurations sharing TEMPDIR are discarded rather than trusted.
+_ENV_CACHE_FILE = os.path.join(TEMPDIR, '.regrtest_env_cache.json')
+_cheap_tests = None
+_cheap_tests_dirty = False
+
+def _env_cache_fingerprint():
+    """Identify the configuration the cheap-test cache is valid for."""
+    return '{}\n{}\n{}'.format(sys.version,
+                               os.path.dirname(os.path.abspath(__file__)),
+                               ' '.join(sorted(support.use_resources or ())))
+
+def _test_mtime(test):
+    """Return the mtime of the test's source, or None if it is unknown."""
+    testdir = findtestdir()
+    for path in (os.path.join(testdir, test + '.py'),
+                 os.path.join(testdir, test, '__init__.py')):
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            pass
+    return None
+
+def _load_cheap_tests():
+    """Return the test -> source mtime mapping of tests known not to
+    modify the environment."""
+    global _cheap_tests
+    if _cheap_tests is None:
+        import atexit
+        try:
+            with open(_ENV_CACHE_FILE) as fp:
+                cached = json.load(fp)
+            if cached.get('fingerprint') == _env_cache_fingerprint():
+                _cheap_tests = dict(cached['tests'])
+            else:
+                _cheap_tests = {}
+        except (OSError, ValueError, AttributeError, KeyError, TypeError):
+            _cheap_tests = {}
+        atexit.register(_save_cheap_tests)
+    return _cheap_tests
+
+def _is_cheap_test(test):
+    """True if the test's current source is known not to modify the
+    environment."""
+    mtime = _test_mtime(test)
+    return mtime is not None and _load_cheap_tests().get(test) == mtime
+
+def _classify_cheap_test(test):
+    """Record that a test completed without changing the environment."""
+    global _cheap_tests_dirty
+    if support.match_tests is not None:
+        # Only part of the module ran; that proves nothing about the rest.
+        return
+    mtime = _test_mtime(test)
+    if mtime is None:
+        return
+    cheap_tests = _load_cheap_tests()
+    if cheap_tests.get(test) != mtime:
+        cheap_tests[test] = mtime
+        _cheap_tests_dirty = True
+
+def _save_cheap_tests():
+    if not _cheap_tests_dirty:
+        return
+    # Write-and-replace so concurrent -j workers cannot see a truncated
+    # file; losing the race only costs a few cache entries.
+    tmpfile = '{}.{}'.format(_ENV_CACHE_FILE, os.getpid())
+    try:
+        with open(tmpfile, 'w') as fp:
+            json.dump({'fingerprint': _env_cache_fingerprint(),
+                       'tests': _cheap_tests}, fp)
+        os.replace(tmpfile, _ENV_CACHE_FILE)
+    except OSError:
+        pass
+
+class _null_test_environment:
+    """Stand-in for saved_test_environment for tests that a previous run
+    classified as leaving the environment untouched."""
+
+    changed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
 def runtest_inner(test, verbose, quiet,
-                  huntrleaks=False, display_failure=True):
+                  huntrleaks=False, display_failure=True, pgo=False,
+                  env_cache=False):
     support.unload(test)
 
     test_time = 0.0
     refleak = False  # True if the test leaked references.
     try:
-        if test.startswith('test.'):
-            abstest = test
+        # Always import the test from the test package.
+        abstest = test if test.startswith('test.') else 'test.' + test
+        if pgo or (env_cache and _is_cheap_test(test)):
+            # PGO training only cares about exercising code; skip the
+            # environment snapshot entirely.
+            env_saver = _null_test_environment()
         else:
-            # Always import it from the test package
-            abstest = 'test.' + test
-        with saved_test_environment(test, verbose, quiet) as environment:
-            start_time = time.time()
+            env_saver = saved_test_environment(test, verbose, quiet)
+        with env_saver as environment:
+            start_time = time.monotonic()
             the_module = importlib.import_module(abstest)
             # If the test has a test_main, that will run the appropriate
             # tests.  If not, use normal unittest test loading.
@@ -1278,43 +1833,44 @@ def runtest_inner(test, verbose, quiet,
             test_runner()
             if huntrleaks:
                 refleak = dash_R(the_module, test, test_runner, huntrleaks)
-            test_time = time.time() - start_time
+            test_time = time.monotonic() - start_time
     except support.ResourceDenied as msg:
-        if not quiet:
+        if not quiet and not pgo:
             print(test, "skipped --", msg)
             sys.stdout.flush()
         return RESOURCE_DENIED, test_time
     except unittest.SkipTest as msg:
-        if not quiet:
+        if not quiet and not pgo:
             print(test, "skipped --", msg)
             sys.stdout.flush()
         return SKIPPED, test_time
     except KeyboardInterrupt:
         raise
     except support.TestFailed as msg:
-        if display_failure:
-            print("test", test, "failed --", msg, file=sys.stderr)
-        else:
-            print("test", test, "failed", file=sys.stderr)
-        sys.stderr.flush()
+        if not pgo:
+            if display_failure:
+                print("test", test, "failed --", msg, file=sys.stderr,
+                      flush=True)
+            else:
+                print("test", test, "failed", file=sys.stderr, flush=True)
         return FAILED, test_time
     except:
-        msg = traceback.format_exc()
-        print("test", test, "crashed --", msg, file=sys.stderr)
-        sys.stderr.flush()
+        if not pgo:
+            # Only pay for formatting the traceback when it is shown.
+            print("test", test, "crashed --", traceback.format_exc(),
+                  file=sys.stderr, flush=True)
         return FAILED, test_time
     else:
         if refleak:
             return FAILED, test_time
         if environment.changed:
             return ENV_CHANGED, test_time
+        if env_cache and not pgo:
+            # Without monitoring there is no evidence to classify on.
+            _classify_cheap_test(test)
         return PASSED, test_time
 
 def cleanup_test_droppings(testname, verbose):
-    import shutil
-    import stat
-    import gc
-
     # First kill any dangling references to open files etc.
     # This can also issue some ResourceWarnings which would otherwise get
     # triggered during the following test run, and possibly produce failures.
@@ -1429,7 +1985,7 @@ def dash_R(the_module, test, indirect_test, huntrleaks):
     return failed
 
 def dash_R_cleanup(fs, ps, pic, zdc, abcs):
-    import gc, copyreg
+    import copyreg
     import _strptime, linecache
     import urllib.parse, urllib.request, mimetypes, doctest
     import struct, filecmp, collections.abc
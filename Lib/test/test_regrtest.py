@@ -6,6 +6,7 @@ import argparse
 import faulthandler
 import getopt
 import os.path
+import threading
 import unittest
 from test import regrtest, support
 
@@ -201,6 +202,24 @@ class ParseArgsTestCase(unittest.TestCase):
                 self.checkError([opt, '2', '-l'], "don't go together")
                 self.checkError([opt, '2', '-M', '4G'], "don't go together")
 
+    def test_pgo(self):
+        ns = regrtest._parse_args(['--pgo'])
+        self.assertTrue(ns.pgo)
+
+    def test_env_cache(self):
+        ns = regrtest._parse_args(['--env-cache'])
+        self.assertTrue(ns.env_cache)
+        ns = regrtest._parse_args([])
+        self.assertFalse(ns.env_cache)
+
+    def test_fresh(self):
+        ns = regrtest._parse_args(['--fresh'])
+        self.assertTrue(ns.fresh)
+
+    def test_worker_loop(self):
+        ns = regrtest._parse_args(['--worker-loop'])
+        self.assertTrue(ns.worker_loop)
+
     def test_coverage(self):
         for opt in '-T', '--coverage':
             with self.subTest(opt=opt):
@@ -271,5 +290,59 @@ class ParseArgsTestCase(unittest.TestCase):
         self.assertEqual(ns.args, ['foo'])
 
 
+class WorkerHelpersTestCase(unittest.TestCase):
+
+    """Test the helpers of the -j worker protocol."""
+
+    def test_encode_decode_roundtrip(self):
+        for obj in (None, True, 42, 1.5, 'ascii', 'caf\xe9',
+                    ('PASSED', 0.25), [1, 2, 3],
+                    {'timeout': None, 'failfast': False}):
+            with self.subTest(obj=obj):
+                data = regrtest._encode_data(obj)
+                self.assertIsInstance(data, str)
+                self.assertNotIn('\n', data)
+                self.assertEqual(regrtest._decode_data(data), obj)
+        # lines read from a pipe arrive as bytes
+        data = regrtest._encode_data('spam').encode('ascii')
+        self.assertEqual(regrtest._decode_data(data), 'spam')
+
+    def test_split_result_line(self):
+        split = regrtest._split_result_line
+        self.assertEqual(split(''), ('', ''))
+        self.assertEqual(split('   \n'), ('', ''))
+        self.assertEqual(split('result'), ('', 'result'))
+        self.assertEqual(split('result\n'), ('', 'result'))
+        self.assertEqual(split('output\nresult\n'), ('output', 'result'))
+        self.assertEqual(split('out1\nout2\nresult \t\r\n'),
+                         ('out1\nout2', 'result'))
+
+    def test_fast_queue(self):
+        q = regrtest._FastQueue()
+        q.put(1)
+        q.put(2)
+        self.assertEqual(q.get(), 1)
+        self.assertEqual(q.get(), 2)
+        # get() blocks until another thread puts an item
+        results = []
+        thread = threading.Thread(target=lambda: results.append(q.get()))
+        thread.start()
+        q.put('item')
+        thread.join()
+        self.assertEqual(results, ['item'])
+
+
+class FindTestsTestCase(unittest.TestCase):
+
+    """Test regrtest's test discovery."""
+
+    def test_findtests_defaults(self):
+        tests = regrtest.findtests()
+        self.assertIsInstance(tests, list)
+        self.assertEqual(tests[:len(regrtest.STDTESTS)],
+                         list(regrtest.STDTESTS))
+        self.assertIn('test_regrtest', tests)
+
+
 if __name__ == '__main__':
     unittest.main()